@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Request, HTTPException
 import pandas as pd
 
+from app.utils.responses import ORJSONResponse
+
 router = APIRouter(
     prefix="/alerts",
     tags=["Alerts"]
@@ -9,10 +11,51 @@ router = APIRouter(
 # -----------------------------------------
 # Helper
 # -----------------------------------------
+KEYS = ["Distributor ID", "US States"]
+
+
 def get_df(request: Request) -> pd.DataFrame:
-    if not hasattr(request.app.state, "df"):
+    if not hasattr(request.app.state, "df_clean"):
         raise HTTPException(400, "Dataset not uploaded yet")
-    return request.app.state.df.copy()
+    return request.app.state.df_clean
+
+
+def aggregate_by_distributor_state(request: Request) -> pd.DataFrame:
+    """
+    Sums waste / allowance / returns / deliveries per
+    (Distributor ID, US States) on the categorical keys of df_clean.
+    Returns a small frame sorted by key, NA keys dropped.
+    """
+    return (
+        get_df(request)
+        .groupby(KEYS, as_index=False, observed=True)
+        .agg(
+            waste=("Waste_Quantity_Sum", "sum"),
+            allowance=("Waste_Allowance_Quantity", "sum"),
+            returns=("Returns_Quantity", "sum"),
+            deliveries=("Deliveries_Quantity", "sum")
+        )
+    )
+
+
+def build_alerts(rows: pd.DataFrame, severity: str, title: str,
+                 description, category: str) -> pd.DataFrame:
+    """
+    Builds one alert per row of an aggregated (Distributor ID, US States)
+    frame. `description` may be a scalar or a per-row Series.
+    """
+    if isinstance(description, pd.Series):
+        description = description.to_numpy()
+
+    return pd.DataFrame({
+        "severity": severity,
+        "title": title,
+        "description": description,
+        "distributor_id": rows["Distributor ID"].astype(int).to_numpy(),
+        "state": rows["US States"].to_numpy(),
+        "category": category,
+        "time_ref": "Recent"
+    })
 
 
 # =================================================
@@ -27,92 +70,67 @@ def get_alerts(
 ):
     severity = severity.upper()
 
-    df = get_df(request)
+    alerts = []
 
     # -------------------------------
-    # Cleanup
+    # Single aggregation pass for all branches
     # -------------------------------
-    df.columns = df.columns.str.strip()
-
-    numeric_cols = [
-        "Waste_Quantity_Sum",
-        "Waste_Allowance_Quantity",
-        "Returns_Quantity",
-        "Deliveries_Quantity"
-    ]
-
-    for c in numeric_cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    df = df.dropna(subset=["Distributor ID", "US States"])
-
-    alerts = []
+    agg_df = aggregate_by_distributor_state(request)
 
     # =================================================
     # HIGH — Waste exceeded allowance
     # =================================================
-    over_allow = (
-        df.groupby(["Distributor ID", "US States"], as_index=False)
-        .agg(
-            waste=("Waste_Quantity_Sum", "sum"),
-            allowance=("Waste_Allowance_Quantity", "sum")
-        )
+    over_allow = agg_df[agg_df["allowance"] > 0]
+    over_allow = over_allow.assign(
+        usage_pct=over_allow["waste"] / over_allow["allowance"]
     )
 
-    over_allow = over_allow[over_allow["allowance"] > 0]
-    over_allow["usage_pct"] = over_allow["waste"] / over_allow["allowance"]
-
-    for _, r in over_allow[over_allow["usage_pct"] > 1.0].iterrows():
-        alerts.append({
-            "severity": "HIGH",
-            "title": "Waste Threshold Exceeded",
-            "description": f"Waste exceeded allowance by {(r['usage_pct']-1)*100:.1f}%",
-            "distributor_id": int(r["Distributor ID"]),
-            "state": r["US States"],
-            "category": "Stale Inventory",
-            "time_ref": "Recent"
-        })
+    high = over_allow[over_allow["usage_pct"] > 1.0]
+    alerts.append(build_alerts(
+        high,
+        severity="HIGH",
+        title="Waste Threshold Exceeded",
+        description=(
+            "Waste exceeded allowance by "
+            + ((high["usage_pct"] - 1) * 100).map("{:.1f}".format).astype(str)
+            + "%"
+        ),
+        category="Stale Inventory"
+    ))
 
     # =================================================
     # MEDIUM — High returns
     # =================================================
-    returns = (
-        df.groupby(["Distributor ID", "US States"], as_index=False)
-        .agg(
-            returns=("Returns_Quantity", "sum"),
-            deliveries=("Deliveries_Quantity", "sum")
-        )
+    returns = agg_df[agg_df["deliveries"] > 0]
+    returns = returns.assign(
+        return_pct=returns["returns"] / returns["deliveries"]
     )
 
-    returns = returns[returns["deliveries"] > 0]
-    returns["return_pct"] = returns["returns"] / returns["deliveries"]
-
-    for _, r in returns[returns["return_pct"] > 0.08].iterrows():
-        alerts.append({
-            "severity": "MEDIUM",
-            "title": "High Return Rate",
-            "description": f"Returns at {r['return_pct']*100:.1f}% of deliveries",
-            "distributor_id": int(r["Distributor ID"]),
-            "state": r["US States"],
-            "category": "Returns",
-            "time_ref": "Recent"
-        })
+    medium = returns[returns["return_pct"] > 0.08]
+    alerts.append(build_alerts(
+        medium,
+        severity="MEDIUM",
+        title="High Return Rate",
+        description=(
+            "Returns at "
+            + (medium["return_pct"] * 100).map("{:.1f}".format).astype(str)
+            + "% of deliveries"
+        ),
+        category="Returns"
+    ))
 
     # =================================================
     # LOW — Good performance
     # =================================================
-    for _, r in over_allow[over_allow["usage_pct"] < 0.6].iterrows():
-        alerts.append({
-            "severity": "LOW",
-            "title": "Good Inventory Control",
-            "description": "Waste well within allowed limits",
-            "distributor_id": int(r["Distributor ID"]),
-            "state": r["US States"],
-            "category": "Positive Signal",
-            "time_ref": "Recent"
-        })
-
-    alerts_df = pd.DataFrame(alerts)
+    alerts.append(build_alerts(
+        over_allow[over_allow["usage_pct"] < 0.6],
+        severity="LOW",
+        title="Good Inventory Control",
+        description="Waste well within allowed limits",
+        category="Positive Signal"
+    ))
+
+    alerts_df = pd.concat(alerts, ignore_index=True)
 
     # =================================================
     # SUMMARY (unique distributors)
@@ -154,7 +172,9 @@ def get_alerts(
     if state != "ALL":
         alerts_df = alerts_df[alerts_df["state"] == state]
 
-    return {
+    # Returned directly: orjson encodes the records without
+    # FastAPI's jsonable_encoder pass
+    return ORJSONResponse({
         "summary": summary,
         "alerts": alerts_df.drop(columns=["priority"]).to_dict(orient="records")
-    }
+    })
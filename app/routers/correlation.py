@@ -2,6 +2,8 @@ from fastapi import APIRouter, Request, HTTPException
 import pandas as pd
 import numpy as np
 
+from app.utils.cache import get_cached, set_cached
+
 router = APIRouter(
     prefix="/analysis",
     tags=["Correlation Analysis"]
@@ -13,13 +15,18 @@ router = APIRouter(
 def get_df(request: Request) -> pd.DataFrame:
     if not hasattr(request.app.state, "df"):
         raise HTTPException(400, "Dataset not loaded")
-    return request.app.state.df.copy()
+    return request.app.state.df
 
 # ---------------------------------------
 # CORRELATION ANALYSIS API
 # ---------------------------------------
 @router.get("/correlation")
 def correlation_analysis(request: Request):
+    # Depends only on the uploaded dataset; version is read before df
+    cached, version = get_cached(request, "correlation")
+    if cached is not None:
+        return cached
+
     df = get_df(request)
 
     # -----------------------------
@@ -30,7 +37,22 @@ def correlation_analysis(request: Request):
     if numeric_df.shape[1] < 2:
         raise HTTPException(400, "Not enough numeric features")
 
-    corr = numeric_df.corr().round(2)
+    # NaN-free data: single BLAS-backed pass via np.corrcoef.
+    # Otherwise keep pandas' pairwise-complete correlation.
+    vals = numeric_df.to_numpy(dtype=np.float64)
+
+    if np.isnan(vals).any():
+        corr = numeric_df.corr().round(2)
+    else:
+        # Constant columns yield NaN, same as DataFrame.corr()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = np.corrcoef(vals, rowvar=False)
+
+        corr = pd.DataFrame(
+            c,
+            index=numeric_df.columns,
+            columns=numeric_df.columns
+        ).round(2)
 
     # -----------------------------
     # Heatmap payload
@@ -43,19 +65,16 @@ def correlation_analysis(request: Request):
     # -----------------------------
     # Key Relationships
     # -----------------------------
-    relationships = []
-
-    for i in corr.columns:
-        for j in corr.columns:
-            if i != j:
-                relationships.append({
-                    "f1": i,
-                    "f2": j,
-                    "value": corr.loc[i, j]
-                })
+    # Matrix is symmetric: emit each pair once (upper triangle)
+    cv = corr.values
+    iu, ju = np.triu_indices(cv.shape[0], k=1)
 
-    rel_df = pd.DataFrame(relationships)
-    rel_df["abs"] = rel_df["value"].abs()
+    rel_df = pd.DataFrame({
+        "f1": corr.columns[iu],
+        "f2": corr.columns[ju],
+        "value": cv[iu, ju]
+    })
+    rel_df["abs"] = np.abs(rel_df["value"].values)
 
     strong = rel_df[rel_df["abs"] >= 0.75].head(5)
     moderate = rel_df[(rel_df["abs"] >= 0.4) & (rel_df["abs"] < 0.75)].head(5)
@@ -89,8 +108,8 @@ def correlation_analysis(request: Request):
     # -----------------------------
     # Final response
     # -----------------------------
-    return {
+    return set_cached(request, "correlation", version, {
         "heatmap": heatmap,
         "key_relationships": key_relationships,
         "model_recommendations": model_recommendations
-    }
+    })
@@ -2,7 +2,10 @@ from fastapi import APIRouter, Request, HTTPException
 import pandas as pd
 import numpy as np
 
-from app.utils.thresholds import distributor_status
+from app.utils.thresholds import distributor_status_cat
+from app.utils.cache import get_cached, set_cached
+from app.utils.group_sum import group_sum
+from app.utils.responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/inventory",
@@ -10,15 +13,16 @@ router = APIRouter(
 )
 
 # =================================================
-# Helper: get dataset from app state
+# Helper: get cleaned dataset from app state
+# (numeric columns / Month_Year built at upload)
 # =================================================
 def get_df(request: Request) -> pd.DataFrame:
-    if not hasattr(request.app.state, "df"):
+    if not hasattr(request.app.state, "df_clean"):
         raise HTTPException(
             status_code=400,
             detail="Dataset not uploaded yet"
         )
-    return request.app.state.df.copy()
+    return request.app.state.df_clean
 
 
 # =================================================
@@ -38,11 +42,11 @@ STATUS_MAP = {
 # =================================================
 @router.get("/overview")
 def inventory_overview(request: Request):
-    df = get_df(request)
+    cached, version = get_cached(request, "inventory_overview")
+    if cached is not None:
+        return cached
 
-    # ---- Safe numeric conversion ----
-    for col in ["Waste_Quantity_Sum", "Waste_Allowance_Quantity"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    df = get_df(request)
 
     total_waste = df["Waste_Quantity_Sum"].sum()
     total_allowance = df["Waste_Allowance_Quantity"].sum()
@@ -54,7 +58,7 @@ def inventory_overview(request: Request):
 
     # ---- High-risk states (>=80% utilization) ----
     state_risk = (
-        df.groupby("US States", as_index=False)
+        df.groupby("US States", as_index=False, observed=True)
         .agg(
             waste=("Waste_Quantity_Sum", "sum"),
             allowance=("Waste_Allowance_Quantity", "sum")
@@ -68,7 +72,7 @@ def inventory_overview(request: Request):
 
     high_risk_states = state_risk[state_risk["usage_pct"] >= 80]
 
-    return {
+    return set_cached(request, "inventory_overview", version, {
         "total_waste": {
             "value": round(total_waste, 2),
             "change_pct": 12.5   # placeholder
@@ -84,7 +88,7 @@ def inventory_overview(request: Request):
             "value": int(high_risk_states.shape[0]),
             "change": 2          # placeholder
         }
-    }
+    })
 
 
 # =================================================
@@ -92,13 +96,11 @@ def inventory_overview(request: Request):
 # =================================================
 @router.get("/charts")
 def inventory_charts(request: Request):
-    df = get_df(request)
+    cached, version = get_cached(request, "inventory_charts")
+    if cached is not None:
+        return cached
 
-    # ---- Build Month-Year safely ----
-    df["Month_Year"] = pd.to_datetime(
-        df["Year"].astype(str) + "-" + df["Months"].astype(str),
-        errors="coerce"
-    )
+    df = get_df(request)
 
     monthly = (
         df.dropna(subset=["Month_Year"])
@@ -111,23 +113,24 @@ def inventory_charts(request: Request):
         .tail(6)   # last 6 months
     )
 
-    return {
-        "allowed_vs_actual": [
-            {
-                "month": row["Month_Year"].strftime("%b"),
-                "allowed": round(row["allowed"], 2),
-                "actual": round(row["actual"], 2)
-            }
-            for _, row in monthly.iterrows()
-        ],
-        "loss_trend": [
-            {
-                "month": row["Month_Year"].strftime("%b"),
-                "value": round(row["actual"], 2)
-            }
-            for _, row in monthly.iterrows()
-        ]
-    }
+    # ---- Format once per column ----
+    # Python's round() per value, as in distributor-status (six rows)
+    monthly = monthly.assign(
+        month=monthly["Month_Year"].dt.strftime("%b"),
+        allowed=monthly["allowed"].map(lambda v: round(float(v), 2)),
+        actual=monthly["actual"].map(lambda v: round(float(v), 2))
+    )
+
+    return set_cached(request, "inventory_charts", version, {
+        "allowed_vs_actual": (
+            monthly[["month", "allowed", "actual"]]
+            .to_dict(orient="records")
+        ),
+        "loss_trend": (
+            monthly.assign(value=monthly["actual"])[["month", "value"]]
+            .to_dict(orient="records")
+        )
+    })
 
 
 # =================================================
@@ -137,24 +140,19 @@ def inventory_charts(request: Request):
 def distributor_status_table(request: Request):
     df = get_df(request)
 
-    # ---- Force numeric ----
-    for col in ["Waste_Allowance_Quantity", "Waste_Quantity_Sum"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # ---- Compute medians ----
-    median_allowance = df["Waste_Allowance_Quantity"].median()
-    median_waste = df["Waste_Quantity_Sum"].median()
+    # ---- Median-filled quantities (shared frame is never mutated) ----
+    aq = df["Waste_Allowance_Quantity"]
+    wq = df["Waste_Quantity_Sum"]
 
-    # ---- Fill missing with MEDIAN ----
-    df["Waste_Allowance_Quantity"] = df["Waste_Allowance_Quantity"].fillna(median_allowance)
-    df["Waste_Quantity_Sum"] = df["Waste_Quantity_Sum"].fillna(median_waste)
+    median_allowance = aq.median()
+    median_waste = wq.median()
 
-    dist = (
-        df.groupby("Distributor ID", as_index=False)
-        .agg(
-            allowance=("Waste_Allowance_Quantity", "sum"),
-            actual_waste=("Waste_Quantity_Sum", "sum")
-        )
+    dist = group_sum(
+        df["Distributor ID"],
+        pd.DataFrame({
+            "allowance": aq.fillna(median_allowance).to_numpy(),
+            "actual_waste": wq.fillna(median_waste).to_numpy()
+        })
     )
 
     # ---- % utilization ----
@@ -170,24 +168,22 @@ def distributor_status_table(request: Request):
     ) * 100
 
     # ---- Risk classification ----
-    dist["risk_status"] = dist["pct_from_limit"].apply(
-        lambda x: distributor_status(x, np.nan)
+    dist["risk_status"] = distributor_status_cat(
+        dist["pct_from_limit"].to_numpy(), np.nan
     )
 
     # ---- UI status mapping ----
-    dist["status"] = dist["risk_status"].apply(
-        lambda x: STATUS_MAP.get(x, "OK")
-    )
+    dist["status"] = dist["risk_status"].map(STATUS_MAP).fillna("OK")
 
     # ---- JSON-safe response ----
-    return [
-        {
-            "distributor_id": str(row["Distributor ID"]),
-            "allowance": round(float(row["allowance"]), 2),
-            "actual_waste": round(float(row["actual_waste"]), 2),
-            "utilization_pct": round(float(row["utilization_pct"]), 1),
-            "status": row["status"]
-        }
-        for _, row in
-        dist.sort_values("utilization_pct", ascending=False).iterrows()
-    ]
+    dist = dist.sort_values("utilization_pct", ascending=False)
+    dist["distributor_id"] = dist["Distributor ID"].astype(str)
+    # Python's correctly-rounded round(), not numpy's multiply-rint-divide
+    # (one value per distributor, so the per-element call is cheap)
+    dist["allowance"] = dist["allowance"].map(lambda v: round(float(v), 2))
+    dist["actual_waste"] = dist["actual_waste"].map(lambda v: round(float(v), 2))
+    dist["utilization_pct"] = dist["utilization_pct"].map(lambda v: round(float(v), 1))
+
+    return ORJSONResponse(dist[
+        ["distributor_id", "allowance", "actual_waste", "utilization_pct", "status"]
+    ].to_dict(orient="records"))
@@ -5,6 +5,8 @@ import pandas as pd
 import numpy as np
 
 from app.utils.thresholds import waste_trend_arrow
+from app.utils.group_sum import group_sum
+from app.utils.responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/risk",
@@ -15,15 +17,15 @@ router = APIRouter(
 # Helpers
 # =================================================
 def get_df(request: Request) -> pd.DataFrame:
-    if not hasattr(request.app.state, "df"):
+    if not hasattr(request.app.state, "df_clean"):
         raise HTTPException(400, "Dataset not uploaded yet")
-    return request.app.state.df.copy()
+    return request.app.state.df_clean
 
 
 def get_dq(request: Request) -> pd.DataFrame:
     if not hasattr(request.app.state, "data_dist_quarter"):
         raise HTTPException(400, "Distributor-quarter data not built")
-    return request.app.state.data_dist_quarter.copy()
+    return request.app.state.data_dist_quarter
 
 # =================================================
 # 1️⃣ RISK OVERVIEW  (OVERVIEW TAB)
@@ -48,20 +50,14 @@ def risk_overview(
     # =================================================
     # BASE DATA
     # =================================================
+    # year_only / Month_Name are built once at upload
     df = get_df(request)
 
-    # --- Parse Month-Year (same as Streamlit) ---
-    df["Month_Parsed"] = pd.to_datetime(
-        df["Months"], format="%b-%y", errors="coerce"
-    )
-    df["Year_Parsed"] = df["Month_Parsed"].dt.year
-    df["Month_Name"] = df["Month_Parsed"].dt.strftime("%b")
-
     # =================================================
     # APPLY TIME FILTERS ONLY (MULTI-SELECT SAFE)
     # =================================================
     if year and "All Years" not in year:
-        df = df[df["Year_Parsed"].isin(year)]
+        df = df[df["year_only"].isin(year)]
 
     if month and "All Months" not in month:
         df = df[df["Month_Name"].isin(month)]
@@ -70,19 +66,19 @@ def risk_overview(
     # STATE-WISE WASTE (TOP 10 STATES)
     # =================================================
     state_wise = (
-        df.groupby("US States", as_index=False)["Waste_Quantity_Sum"]
-        .sum()
+        group_sum(df["US States"], df[["Waste_Quantity_Sum"]])
         .sort_values("Waste_Quantity_Sum", ascending=False)
         .head(10)
     )
 
-    state_wise_payload = [
-        {
-            "state": r["US States"],
-            "value": round(r["Waste_Quantity_Sum"], 2)
-        }
-        for _, r in state_wise.iterrows()
-    ]
+    state_wise_payload = (
+        state_wise
+        .rename(columns={"US States": "state", "Waste_Quantity_Sum": "value"})
+        # Python's round() per value, as on the original iterrows() rows
+        .assign(value=lambda d: d["value"].map(lambda v: round(float(v), 2)))
+        [["state", "value"]]
+        .to_dict(orient="records")
+    )
 
     # =================================================
     # DISTRIBUTOR RISK (GLOBAL, YEAR FILTER ONLY)
@@ -93,7 +89,8 @@ def risk_overview(
         dq = dq[dq["year_only"].isin(year)]
 
     dist_risk = (
-        dq.groupby(["Distributor ID", "US States"], as_index=False)
+        # observed=True: US States is categorical in dq
+        dq.groupby(["Distributor ID", "US States"], as_index=False, observed=True)
         .agg(
             total_waste=("total_waste", "sum"),
             avg_pct_from_limit=("pct_from_limit", "mean")
@@ -107,9 +104,9 @@ def risk_overview(
         .round(1)
     )
 
-    dist_risk["status"] = np.where(
-        dist_risk["risk_pct"] >= 80, "High Risk",
-        np.where(dist_risk["risk_pct"] >= 60, "Risk", "OK")
+    p = dist_risk["risk_pct"].to_numpy()
+    dist_risk["status"] = np.select(
+        [p >= 80, p >= 60], ["High Risk", "Risk"], default="OK"
     )
 
     top_risky = (
@@ -118,15 +115,13 @@ def risk_overview(
         .head(5)
     )
 
-    high_risk_payload = [
-        {
-            "distributor_id": int(r["Distributor ID"]),
-            "state": r["US States"],
-            "risk_pct": r["risk_pct"],
-            "status": r["status"]
-        }
-        for _, r in top_risky.iterrows()
-    ]
+    high_risk_payload = (
+        top_risky
+        .rename(columns={"Distributor ID": "distributor_id", "US States": "state"})
+        .assign(distributor_id=lambda d: d["distributor_id"].astype(int))
+        [["distributor_id", "state", "risk_pct", "status"]]
+        .to_dict(orient="records")
+    )
 
     # =================================================
     # KEY INSIGHTS (GLOBAL STORY)
@@ -190,39 +185,36 @@ def distributor_trend(
 
     # -------------------------------
     # FILTER: Distributor (REQUIRED)
+    # Row index built at upload
     # -------------------------------
-    df = dq[dq["Distributor ID"].astype(str) == distributor_id]
+    idx = request.app.state.dq_by_dist.get(distributor_id)
 
-    if df.empty:
+    if idx is None:
         raise HTTPException(
             status_code=404,
             detail="No data found for selected distributor"
         )
 
-    # -------------------------------
-    # SORT BY TIME
-    # -------------------------------
-    df = df.sort_values(["year_only", "quarter"])
+    # Already time-ordered: data_dist_quarter is presorted at upload
+    df = dq.loc[idx]
 
     # -------------------------------
     # RESPONSE FORMAT (UI READY)
     # -------------------------------
-    return {
+    # Measures are rounded once at upload; NaN pct_change → None
+    pct_change = df["pct_change_Wastes_from_last_quarter"]
+
+    return ORJSONResponse({
         "distributor_id": distributor_id,
-        "trend": [
-            {
-                "quarter": f"{row['year_only']} {row['quarter']}",
-                "waste": round(row["total_waste"], 2),
-                "pct_change": (
-                    None
-                    if pd.isna(row["pct_change_Wastes_from_last_quarter"])
-                    else round(row["pct_change_Wastes_from_last_quarter"], 2)
-                ),
-                "status": row["Status"]
-            }
-            for _, row in df.iterrows()
-        ]
-    }
+        "trend": pd.DataFrame({
+            "quarter": (
+                df["year_only"].astype(str) + " " + df["quarter"].astype(str)
+            ),
+            "waste": df["total_waste"],
+            "pct_change": pct_change.astype(object).where(pct_change.notna(), None),
+            "status": df["Status"],
+        }).to_dict(orient="records")
+    })
 # =================================================
 # 3️⃣ QUARTER COMPARISON (UI ALIGNED)
 # =================================================
@@ -236,13 +228,12 @@ def quarter_comparison(
     distributor_2: str | None = None,
 ):
     dq = get_dq(request)
+    key_index = request.app.state.dq_key_index
 
     # -------------------------------
     # State filter (REQUIRED)
     # -------------------------------
-    dq = dq[dq["US States"] == state]
-
-    if dq.empty:
+    if state not in request.app.state.dq_states:
         raise HTTPException(404, "No data for selected state")
 
     # -------------------------------
@@ -258,9 +249,6 @@ def quarter_comparison(
     y1, q1 = parse_quarter(quarter_a)
     y2, q2 = parse_quarter(quarter_b)
 
-    df_q1 = dq[(dq["year_only"] == y1) & (dq["quarter"] == q1)]
-    df_q2 = dq[(dq["year_only"] == y2) & (dq["quarter"] == q2)]
-
     # -------------------------------
     # Distributor selection
     # -------------------------------
@@ -268,8 +256,22 @@ def quarter_comparison(
     if distributor_2:
         distributors.append(distributor_2)
 
-    df_q1 = df_q1[df_q1["Distributor ID"].astype(str).isin(distributors)]
-    df_q2 = df_q2[df_q2["Distributor ID"].astype(str).isin(distributors)]
+    dist_ids = request.app.state.dq_dist_ids
+    ids = [dist_ids[d] for d in distributors if d in dist_ids]
+
+    # Index lookup on (state, year, quarter, distributor);
+    # rows keep their dq order
+    def rows_for(y: int, q: str) -> pd.DataFrame:
+        if not ids:
+            return dq.iloc[:0]
+        pos = key_index.get_indexer([(state, y, q, i) for i in ids])
+        return dq.iloc[np.unique(pos[pos >= 0])]
+
+    df_q1 = rows_for(y1, q1)
+    df_q2 = rows_for(y2, q2)
+
+    # to_dict yields native Python scalars (JSON-encodable)
+    cols = ["Distributor ID", "total_waste", "Status"]
 
     # =================================================
     # CASE 1: SAME QUARTER (A == B)
@@ -278,87 +280,69 @@ def quarter_comparison(
         if df_q1.empty:
             return {"comparison": []}
 
-        base = df_q1.iloc[0]
+        base = df_q1.iloc[:1][cols].to_dict("records")[0]
 
-        return {
+        return ORJSONResponse({
             "state": state,
             "quarter_a": quarter_a,
             "quarter_b": quarter_b,
             "comparison": [
                 {
                     "distributor_id": base["Distributor ID"],
-                    "total_waste_q1": round(base["total_waste"], 2),
-                    "total_waste_q2": round(base["total_waste"], 2),
+                    "total_waste_q1": base["total_waste"],
+                    "total_waste_q2": base["total_waste"],
                     "delta": 0,
                     "trend": "➖",
                     "status_change": f'{base["Status"]} → {base["Status"]}',
                 }
             ],
-        }
+        })
 
     # =================================================
     # CASE 2: DIFFERENT QUARTERS
     # =================================================
-    merged = df_q1.merge(
-        df_q2,
-        on="Distributor ID",
-        how="outer",
-        suffixes=("_q1", "_q2"),
-    )
+    # Frames hold at most one row per distributor: join them by key
+    a = {r["Distributor ID"]: r for r in df_q1[cols].to_dict("records")}
+    b = {r["Distributor ID"]: r for r in df_q2[cols].to_dict("records")}
 
-    if merged.empty:
-        return {"comparison": []}
+    keys = sorted(a.keys() | b.keys())
 
-    merged["delta"] = (
-        merged["total_waste_q2"].fillna(0)
-        - merged["total_waste_q1"].fillna(0)
-    )
-
-    merged["trend"] = merged["delta"].apply(waste_trend_arrow)
-
-    merged["status_change"] = (
-        merged["Status_q1"].fillna("Unknown")
-        + " → "
-        + merged["Status_q2"].fillna("Unknown")
-    )
+    if not keys:
+        return {"comparison": []}
 
-    return {
+    # total_waste is rounded once at upload; only delta needs rounding
+    comparison = []
+    for k in keys:
+        r1, r2 = a.get(k), b.get(k)
+        w1 = r1["total_waste"] if r1 else 0
+        w2 = r2["total_waste"] if r2 else 0
+        delta = w2 - w1
+
+        comparison.append({
+            "distributor_id": k,
+            "total_waste_q1": w1,
+            "total_waste_q2": w2,
+            "delta": round(delta, 2),
+            "trend": waste_trend_arrow(delta),
+            "status_change": (
+                f'{r1["Status"] if r1 else "Unknown"} → '
+                f'{r2["Status"] if r2 else "Unknown"}'
+            ),
+        })
+
+    return ORJSONResponse({
         "state": state,
         "quarter_a": quarter_a,
         "quarter_b": quarter_b,
-        "comparison": [
-            {
-                "distributor_id": r["Distributor ID"],
-                "total_waste_q1": round(r["total_waste_q1"], 2)
-                if not pd.isna(r["total_waste_q1"]) else 0,
-                "total_waste_q2": round(r["total_waste_q2"], 2)
-                if not pd.isna(r["total_waste_q2"]) else 0,
-                "delta": round(r["delta"], 2),
-                "trend": r["trend"],
-                "status_change": r["status_change"],
-            }
-            for _, r in merged.iterrows()
-        ],
-    }
+        "comparison": comparison,
+    })
 
 # =================================================
 # 4️⃣ TOP RISKY DISTRIBUTORS
 # =================================================
 @router.get("/top-risky")
 def top_risky_distributors(request: Request):
-    dq = get_dq(request)
-
-    top = (
-        dq.sort_values("pct_from_limit", ascending=False)
-        .head(5)
-    )
+    get_dq(request)
 
-    return [
-        {
-            "distributor_id": r["Distributor ID"],
-            "state": r["US States"],
-            "risk_pct": round(r["pct_from_limit"], 1),
-            "status": r["Status"]
-        }
-        for _, r in top.iterrows()
-    ]
+    # Built at upload
+    return ORJSONResponse(request.app.state.top_risky)
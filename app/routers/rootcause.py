@@ -10,6 +10,12 @@ def root_cause_analysis(request: Request):
 
     model_lab = request.app.state.model_lab
 
+    # Pure function of model_lab, which is replaced (never mutated)
+    # on every training run
+    cache = getattr(request.app.state, "root_cause_cache", None)
+    if cache is not None and cache[0] is model_lab:
+        return cache[1]
+
     shap = model_lab.get("shap")
     if not shap:
         raise HTTPException(400, "SHAP data not available")
@@ -48,4 +54,6 @@ def root_cause_analysis(request: Request):
         ]
     }
 
+    request.app.state.root_cause_cache = (model_lab, response)
+
     return response
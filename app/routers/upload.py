@@ -1,14 +1,24 @@
 from fastapi import APIRouter, UploadFile, File, Request, HTTPException
+from importlib.util import find_spec
 import pandas as pd
 
 from app.utils.filters import prepare_time_columns
-from app.utils.distributor_quarter_transform import build_distributor_quarter_df
+from app.utils.distributor_quarter_transform import (
+    build_distributor_quarter_df,
+    build_top_risky,
+)
+from app.utils.clean_dataset import build_clean_df
 
 router = APIRouter(
     prefix="/upload",
     tags=["Upload"]
 )
 
+# Faster readers when installed (multithreaded Arrow CSV, Rust xlsx);
+# otherwise pandas' defaults
+CSV_ENGINE = "pyarrow" if find_spec("pyarrow") else "c"
+EXCEL_ENGINE = "calamine" if find_spec("python_calamine") else None
+
 @router.post("/")
 def upload_dataset(
     request: Request,
@@ -18,9 +28,9 @@ def upload_dataset(
     # Read file
     # -------------------------------
     if file.filename.endswith(".csv"):
-        df = pd.read_csv(file.file)
+        df = pd.read_csv(file.file, engine=CSV_ENGINE)
     else:
-        df = pd.read_excel(file.file)
+        df = pd.read_excel(file.file, engine=EXCEL_ENGINE)
 
     # -------------------------------
     # 🔑 VERY IMPORTANT STEP
@@ -29,23 +39,70 @@ def upload_dataset(
     df = prepare_time_columns(df)
     # This creates: year_only, month_only, quarter
 
-    # -------------------------------
-    # Store base dataset
-    # -------------------------------
-    request.app.state.df = df
-
     # -------------------------------
     # Build distributor-quarter dataset
+    # (everything derived is built into locals first, so a failed
+    # upload leaves the previous dataset fully in place)
     # -------------------------------
     try:
         data_dist_quarter = build_distributor_quarter_df(df)
-        request.app.state.data_dist_quarter = data_dist_quarter
+        top_risky = build_top_risky(data_dist_quarter)
+        # Distributor ID (as str) → row labels, for per-distributor lookups
+        dq_by_dist = {
+            str(k): v
+            for k, v in data_dist_quarter.groupby(
+                data_dist_quarter["Distributor ID"].astype(str)
+            ).groups.items()
+        }
+        # Distributor ID (as str) → native ID value, so request params
+        # can be matched without casting the column per request
+        dq_dist_ids = {
+            str(k): k for k in data_dist_quarter["Distributor ID"].unique()
+        }
+        # (state, year, quarter, Distributor ID) → row position,
+        # for quarter comparisons
+        dq_key_index = pd.MultiIndex.from_frame(
+            data_dist_quarter[
+                ["US States", "year_only", "quarter", "Distributor ID"]
+            ]
+        )
+        dq_states = set(data_dist_quarter["US States"].dropna())
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Distributor-quarter build failed: {str(e)}"
         )
 
+    # -------------------------------
+    # Cleaned / typed dataset
+    # (endpoints only aggregate on request)
+    # -------------------------------
+    try:
+        df_clean = build_clean_df(df)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Dataset cleaning failed: {str(e)}"
+        )
+
+    # -------------------------------
+    # Store: only once every build succeeded
+    # -------------------------------
+    state = request.app.state
+
+    state.df = df
+    state.data_dist_quarter = data_dist_quarter
+    state.top_risky = top_risky
+    state.dq_by_dist = dq_by_dist
+    state.dq_dist_ids = dq_dist_ids
+    state.dq_key_index = dq_key_index
+    state.dq_states = dq_states
+    state.df_clean = df_clean
+
+    # Bumped on every upload; invalidates per-dataset response caches
+    state.df_version = getattr(state, "df_version", 0) + 1
+    state.model_cache = {}
+
     return {
         "message": "Dataset uploaded successfully",
         "rows": df.shape[0],
@@ -0,0 +1,31 @@
+from fastapi import Request
+
+
+def get_cached(request: Request, name: str):
+    """
+    Returns (payload, version): the cached payload for `name` if it was
+    built for the currently uploaded dataset (app.state.df_version),
+    else None, plus the version that was checked.
+
+    Call this before reading the dataset and pass the version on to
+    set_cached, so a payload built from a superseded upload is never
+    stored under the new version.
+    """
+    state = request.app.state
+    version = getattr(state, "df_version", None)
+
+    cache = getattr(state, f"{name}_cache", None)
+    if cache is not None and version is not None and cache[0] == version:
+        return cache[1], version
+    return None, version
+
+
+def set_cached(request: Request, name: str, version, payload):
+    """
+    Stores `payload` under `version` (as returned by get_cached) and
+    returns it. Skipped if an upload has replaced the dataset since.
+    """
+    state = request.app.state
+    if version is not None and version == getattr(state, "df_version", None):
+        setattr(state, f"{name}_cache", (version, payload))
+    return payload
@@ -0,0 +1,81 @@
+import pandas as pd
+
+
+NUMERIC_COLS = [
+    "Waste_Quantity_Sum",
+    "Waste_Allowance_Quantity",
+    "Returns_Quantity",
+    "Deliveries_Quantity",
+]
+
+KEY_COLS = ["Distributor ID", "US States"]
+
+
+def build_clean_df(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the typed dataset shared by the read endpoints.
+
+    Done once at upload so requests only aggregate:
+    - column names stripped
+    - numeric columns coerced to float64
+    - US States / Distributor ID as category (integer-coded group keys)
+    - Month_Parsed / Month_Name from Months (e.g., Feb-23)
+    - Month_Year from Year + Months (inventory charts)
+
+    Rows with missing Distributor ID / US States are kept so totals
+    still include them; groupby drops NA keys on its own.
+    """
+
+    clean = df.rename(columns=str.strip)
+
+    numeric = {
+        c: pd.to_numeric(clean[c], errors="coerce").astype("float64")
+        for c in NUMERIC_COLS
+        if c in clean.columns
+    }
+
+    keys = {
+        c: clean[c].astype("category")
+        for c in KEY_COLS
+        if c in clean.columns
+    }
+
+    # Month columns are derived once per distinct label, then broadcast
+    # back to the rows (same approach as prepare_time_columns)
+    month_codes, month_labels = pd.factorize(
+        clean["Months"], use_na_sentinel=False
+    )
+    label_parsed = pd.to_datetime(month_labels, format="%b-%y", errors="coerce")
+
+    # prepare_time_columns has usually parsed Months already
+    if "Month_Parsed" in clean.columns:
+        month_parsed = clean["Month_Parsed"]
+    else:
+        month_parsed = pd.Series(label_parsed.take(month_codes), index=clean.index)
+
+    extra = {
+        "Month_Parsed": month_parsed,
+        "Month_Name": pd.Series(
+            label_parsed.strftime("%b").take(month_codes), index=clean.index
+        ),
+    }
+
+    if "Year" in clean.columns:
+        year_codes, year_labels = pd.factorize(clean["Year"], use_na_sentinel=False)
+
+        # One code per distinct (Year, Months) pair
+        pair_codes, pairs = pd.factorize(
+            year_codes.astype("int64") * len(month_labels) + month_codes
+        )
+        pair_labels = (
+            pd.Series(year_labels.take(pairs // len(month_labels))).astype(str)
+            + "-"
+            + pd.Series(month_labels.take(pairs % len(month_labels))).astype(str)
+        )
+
+        extra["Month_Year"] = pd.Series(
+            pd.to_datetime(pair_labels, errors="coerce").to_numpy().take(pair_codes),
+            index=clean.index
+        )
+
+    return clean.assign(**numeric, **keys, **extra)
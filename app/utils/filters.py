@@ -9,20 +9,27 @@ def prepare_time_columns(df: pd.DataFrame) -> pd.DataFrame:
 
     Expects column:
     - Months (e.g., Feb-23)
+
+    Columns are added to df in place (no copy); df is returned.
     """
 
-    df = df.copy()
+    # Parse Month-Year safely, once per distinct label
+    # (a handful of months), then broadcast back to the rows
+    codes, labels = pd.factorize(df["Months"], use_na_sentinel=False)
 
-    # Parse Month-Year safely
-    df["Month_Parsed"] = pd.to_datetime(
-        df["Months"], format="%b-%y", errors="coerce"
-    )
+    months = pd.DataFrame({
+        "Month_Parsed": pd.to_datetime(labels, format="%b-%y", errors="coerce")
+    })
 
-    df["year_only"] = df["Month_Parsed"].dt.year
-    df["month_only"] = df["Month_Parsed"].dt.month
+    months["year_only"] = months["Month_Parsed"].dt.year
+    months["month_only"] = months["Month_Parsed"].dt.month
 
-    df["quarter"] = (
-        "Q" + ((df["month_only"] - 1) // 3 + 1).astype("Int64").astype(str)
+    months["quarter"] = (
+        "Q" + ((months["month_only"] - 1) // 3 + 1).astype("Int64").astype(str)
     )
 
+    per_row = months.take(codes).set_axis(df.index)
+    for col in months.columns:
+        df[col] = per_row[col]
+
     return df
@@ -0,0 +1,21 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson (C encoder).
+
+    As default_response_class it only replaces the final dumps: FastAPI
+    still runs jsonable_encoder over plain return values first. Hot
+    record-list endpoints return ORJSONResponse(payload) directly,
+    which skips that pass; numpy scalars/arrays are then encoded
+    natively and NaN becomes null.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
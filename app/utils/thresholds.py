@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from numba import njit
 
 
 def waste_trend_arrow(delta):
@@ -41,3 +43,55 @@ def distributor_status(pct_from_limit: float, pct_change: float) -> str:
 
     # 3️⃣ Fallback
     return "Not Classified"
+
+
+STATUS_LABELS = ["Not Classified", "High Risk", "Risk", "Good", "Very Good"]
+
+
+@njit(cache=True, nogil=True)
+def _status_code_kernel(pct_from_limit, pct_change, out):
+    # Codes index STATUS_LABELS
+    for i in range(pct_from_limit.shape[0]):
+        p = pct_from_limit[i]
+        c = pct_change[i]
+
+        # 1️⃣ Primary: limit-based risk
+        if not np.isnan(p):
+            if p >= 120:
+                out[i] = 1
+            elif p >= 100:
+                out[i] = 2
+            elif p < 80:
+                out[i] = 4
+            else:
+                out[i] = 3
+        # 2️⃣ Secondary: trend-based risk
+        elif not np.isnan(c):
+            if c > 10:
+                out[i] = 1
+            elif c > 0:
+                out[i] = 2
+            elif c < -10:
+                out[i] = 4
+            else:
+                out[i] = 3
+        # 3️⃣ Fallback
+        else:
+            out[i] = 0
+
+
+def distributor_status_cat(pct_from_limit, pct_change) -> pd.Categorical:
+    """
+    Compiled distributor_status over arrays, returned as a Categorical
+    of STATUS_LABELS.
+    """
+
+    pct_from_limit = np.ascontiguousarray(pct_from_limit, dtype=np.float64)
+    pct_change = np.ascontiguousarray(
+        np.broadcast_to(pct_change, pct_from_limit.shape), dtype=np.float64
+    )
+
+    codes = np.empty(pct_from_limit.shape[0], dtype=np.int8)
+    _status_code_kernel(pct_from_limit, pct_change, codes)
+
+    return pd.Categorical.from_codes(codes, STATUS_LABELS)
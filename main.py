@@ -1,9 +1,31 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import upload, inventory, risk, alerts, correlation, model, rootcause
+from app.utils.responses import ORJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CPU-bound model training runs here, outside the GIL of the API process
+    app.state.process_pool = ProcessPoolExecutor(
+        max_workers=2,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    yield
+    app.state.process_pool.shutdown()
 
-app = FastAPI(title="Inventory Sense API", version="1.0.0")
+
+app = FastAPI(
+    title="Inventory Sense API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.filters import prepare_time_columns
+from app.utils.thresholds import distributor_status
+from app.utils.distributor_quarter_transform import (
+    build_distributor_quarter_df,
+    build_top_risky,
+)
+
+
+MEASURES = [
+    "Deliveries_Quantity",
+    "Returns_Quantity",
+    "Waste_Allowance_Quantity",
+    "Waste_Quantity_Sum",
+]
+
+
+def reference_build(eda_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The original pandas implementation: 4-key groupby sum, stable
+    presort, groupby pct_change, row-wise status.
+    """
+    out = (
+        eda_df.groupby(
+            ["Distributor ID", "US States", "year_only", "quarter"],
+            as_index=False
+        )
+        .agg(
+            total_deliveries=("Deliveries_Quantity", "sum"),
+            total_returns=("Returns_Quantity", "sum"),
+            total_waste_allowance=("Waste_Allowance_Quantity", "sum"),
+            total_waste=("Waste_Quantity_Sum", "sum"),
+        )
+    )
+
+    totals = ["total_deliveries", "total_returns", "total_waste_allowance", "total_waste"]
+    out[totals] = out[totals].round(2)
+
+    limit = out["total_waste_allowance"]
+    spoil = out["total_waste"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["pct_from_limit"] = np.where(
+            (limit == 0) | (spoil == 0), 0, ((spoil - limit) / limit) * 100
+        ).round(2)
+
+    out = out.sort_values(
+        ["Distributor ID", "year_only", "quarter"], kind="mergesort"
+    ).reset_index(drop=True)
+
+    out["pct_change_Wastes_from_last_quarter"] = (
+        out.groupby("Distributor ID")["total_waste"].pct_change() * 100
+    ).round(2)
+
+    out["Status"] = out.apply(
+        lambda r: distributor_status(
+            r["pct_from_limit"], r["pct_change_Wastes_from_last_quarter"]
+        ),
+        axis=1,
+    )
+    return out
+
+
+def reference_top_risky(dq: pd.DataFrame, n: int = 5) -> list[dict]:
+    """
+    The original iterrows() payload of /risk/top-risky.
+    """
+    top = dq.sort_values("pct_from_limit", ascending=False).head(n)
+    return [
+        {
+            "distributor_id": r["Distributor ID"],
+            "state": r["US States"],
+            "risk_pct": round(r["pct_from_limit"], 1),
+            "status": r["Status"]
+        }
+        for _, r in top.iterrows()
+    ]
+
+
+def make_upload(n=5000, n_dist=40, states=("CA", "TX", "NY", "FL"), seed=0):
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2022-01-01", periods=24, freq="MS").strftime("%b-%y")
+    df = pd.DataFrame({
+        "Distributor ID": rng.integers(100, 100 + n_dist, n),
+        "US States": rng.choice(list(states), n),
+        "Months": rng.choice(months, n),
+        **{c: np.round(rng.random(n) * 100, 3) for c in MEASURES},
+    })
+    return df
+
+
+def assert_matches_reference(df: pd.DataFrame):
+    eda = prepare_time_columns(df)
+    got = build_distributor_quarter_df(eda)
+    ref = reference_build(eda)
+
+    # Values, row order (presort) and labels must match the reference;
+    # dtypes differ by design (categories, downcast keys)
+    assert list(got.columns) == list(ref.columns)
+    assert len(got) == len(ref)
+    for col in ref.columns:
+        if pd.api.types.is_numeric_dtype(ref[col]):
+            np.testing.assert_array_equal(
+                got[col].to_numpy(dtype=ref[col].dtype),
+                ref[col].to_numpy(),
+                err_msg=col,
+            )
+        else:
+            assert got[col].astype(str).tolist() == ref[col].astype(str).tolist(), col
+
+
+def test_matches_pandas_groupby():
+    assert_matches_reference(make_upload())
+
+
+def test_missing_keys_are_dropped():
+    df = make_upload(seed=1).astype({"Distributor ID": "float64"})
+    df.loc[::17, "Distributor ID"] = np.nan
+    df.loc[::23, "US States"] = None
+    df.loc[::29, "Months"] = "not-a-month"
+    df.loc[::31, "Months"] = None
+    assert_matches_reference(df)
+
+
+def test_nan_measures_are_skipped():
+    df = make_upload(seed=2)
+    for i, c in enumerate(MEASURES):
+        df.loc[i::7, c] = np.nan
+    # A whole group without any waste values sums to 0
+    first = df["Distributor ID"] == df["Distributor ID"].iloc[0]
+    df.loc[first, "Waste_Quantity_Sum"] = np.nan
+    assert_matches_reference(df)
+
+
+def test_integer_measures():
+    df = make_upload(seed=3)
+    df[MEASURES] = (df[MEASURES] * 10).astype("int64")
+    assert_matches_reference(df)
+
+
+def test_wide_composite_key():
+    # 300 distributors x 60 states x ... overflows 16 bits: non-radix path
+    df = make_upload(
+        n=20000, n_dist=300, states=[f"S{i:02d}" for i in range(60)], seed=4
+    )
+    assert_matches_reference(df)
+
+
+def test_empty_frame():
+    eda = prepare_time_columns(make_upload().iloc[:0].copy())
+    got = build_distributor_quarter_df(eda)
+    assert got.empty
+    assert list(got.columns) == list(reference_build(eda).columns)
+
+
+def test_presorted_per_distributor():
+    got = build_distributor_quarter_df(prepare_time_columns(make_upload(seed=5)))
+    keys = got[["Distributor ID", "year_only"]].assign(
+        quarter=got["quarter"].astype(str)
+    )
+    assert keys.equals(
+        keys.sort_values(list(keys.columns), kind="mergesort")
+    )
+
+
+def test_missing_column_raises():
+    eda = prepare_time_columns(make_upload()).drop(columns=["Returns_Quantity"])
+    with pytest.raises(ValueError, match="Returns_Quantity"):
+        build_distributor_quarter_df(eda)
+
+
+def test_top_risky_native_records():
+    dq = build_distributor_quarter_df(prepare_time_columns(make_upload(seed=6)))
+    top = build_top_risky(dq)
+
+    assert len(top) == 5
+    assert [r["risk_pct"] for r in top] == sorted(
+        (r["risk_pct"] for r in top), reverse=True
+    )
+    assert all(type(r["distributor_id"]) is int for r in top)
+
+
+def test_top_risky_rounds_like_python():
+    # 2-decimal values where numpy's rint-based round(1) goes the other way
+    pct = [3648.05, 0.15, 1.45, 2.675, 100.25, 80.35]
+    dq = pd.DataFrame({
+        "Distributor ID": np.arange(101, 101 + len(pct), dtype="int16"),
+        "US States": pd.Categorical(["CA", "TX", "NY", "FL", "CA", "TX"]),
+        "pct_from_limit": pct,
+        "Status": ["High Risk"] * len(pct),
+    })
+
+    top = build_top_risky(dq, n=len(pct))
+
+    assert top == reference_top_risky(dq, n=len(pct))
+    assert top[0]["risk_pct"] == 3648.1
+
+
+def test_top_risky_matches_reference():
+    for seed in range(10):
+        dq = build_distributor_quarter_df(
+            prepare_time_columns(make_upload(n=2000, seed=seed))
+        )
+        assert build_top_risky(dq) == reference_top_risky(dq), seed
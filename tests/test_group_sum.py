@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from app.utils.group_sum import group_sum
+
+
+def make_values(n=50000, seed=0):
+    rng = np.random.default_rng(seed)
+    values = pd.DataFrame({
+        # 3-decimal values: sensitive to uncompensated summation
+        "a": np.round(rng.random(n) * 50, 3),
+        "b": np.where(rng.random(n) < 0.1, np.nan, rng.random(n) * 1e6),
+    })
+    values.loc[7, "a"] = np.inf
+    return rng, values
+
+
+def assert_same_sums(keys, values):
+    got = group_sum(keys, values)
+    ref = values.groupby(keys, as_index=False, observed=True).sum()
+
+    np.testing.assert_array_equal(
+        np.asarray(got[keys.name]), np.asarray(ref[keys.name])
+    )
+    for col in values.columns:
+        # bit-for-bit: both use Kahan summation in row order
+        np.testing.assert_array_equal(got[col].to_numpy(), ref[col].to_numpy())
+
+
+def test_categorical_keys():
+    rng, values = make_values()
+    keys = pd.Series(rng.integers(0, 300, len(values)), name="k").astype("category")
+    keys = keys.cat.add_categories([999])  # unobserved category is dropped
+    assert_same_sums(keys, values)
+
+
+def test_factorized_keys_with_nan():
+    rng, values = make_values(seed=1)
+    keys = pd.Series(rng.choice(["CA", "TX", "NY", None], len(values)), name="k")
+    assert_same_sums(keys, values)
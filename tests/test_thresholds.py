@@ -0,0 +1,29 @@
+import itertools
+
+import numpy as np
+
+from app.utils.thresholds import STATUS_LABELS, distributor_status, distributor_status_cat
+
+
+# Band edges on both sides, plus NaN
+LIMITS = [np.nan, -50.0, 79.99, 80.0, 99.99, 100.0, 119.99, 120.0, 500.0]
+CHANGES = [np.nan, -50.0, -10.01, -10.0, 0.0, 0.01, 10.0, 10.01, 80.0]
+
+
+def test_matches_scalar_rules():
+    pairs = list(itertools.product(LIMITS, CHANGES))
+    limit = np.array([p for p, _ in pairs])
+    change = np.array([c for _, c in pairs])
+
+    got = distributor_status_cat(limit, change)
+
+    assert list(got.categories) == STATUS_LABELS
+    assert list(got) == [distributor_status(p, c) for p, c in pairs]
+
+
+def test_scalar_pct_change_broadcasts():
+    limit = np.array(LIMITS)
+
+    got = distributor_status_cat(limit, np.nan)
+
+    assert list(got) == [distributor_status(p, np.nan) for p in LIMITS]